@@ -1,36 +1,333 @@
 import argparse
+import asyncio
+import contextlib
+import functools
+import hashlib
 import logging
-import pandas as pd
-from mindsdb_sdk import MindsDB
-from mindsdb_sdk.exceptions import MindsDBException
+import math
+import os
+import pickle
+import re
+import socket
+import sys
+from collections import OrderedDict
+from pathlib import Path
+import queue
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import TYPE_CHECKING
+
+# pandas, numpy and mindsdb_sdk are imported where they are used so that a plain
+# --query invocation does not pay for them at interpreter startup.
+if TYPE_CHECKING:
+    import pandas as pd
+
+MindsDB = None
+MindsDBException = None
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
 
+EXACT_CACHE_SIZE = 1024
+SEMANTIC_CACHE_SIZE = 10_000
+SEM_CACHE_BLOCK_ROWS = 256
+DEFAULT_SEM_CACHE_THRESHOLD = 0.92
+DEFAULT_CACHE_TTL = 3600
+QUERY_CACHE_FORMAT = 2
+QUERY_EMBEDDING_MODEL = "models/text-embedding-004"
+EMBED_BATCH_SIZE = 100
+DEFAULT_INSERT_BATCH_SIZE = 256
+DEFAULT_INGEST_WORKERS = 8
+INSERT_MAX_RETRIES = 5
+MAX_PENDING_CHUNKS = 2
+JOB_ACTIVE_STATUSES = ("pending", "running")
+JOB_FAILED_STATUSES = ("failed", "error")
+JOB_POLL_INITIAL_DELAY = 0.5
+JOB_POLL_MAX_DELAY = 5.0
+ARROW_CSV_BLOCK_SIZE = 1 << 22
+DEFAULT_CSV_CHUNKSIZE = 10_000
+PREFETCH_POLL_INTERVAL = 0.1
+HTTP_POOL_CONNECTIONS = 16
+HTTP_POOL_MAXSIZE = 64
+HTTP_SOCKET_OPTIONS = [
+    (socket.IPPROTO_TCP, socket.TCP_NODELAY, 1),
+    (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1),
+]
+DEFAULT_PROJECT = "mindsdb"
+FNV_OFFSET_BASIS = 0xCBF29CE484222325
+FNV_PRIME = 0x100000001B3
+FNV_NULL_HASH = 0x9E3779B97F4A7C15
+CACHE_DIR = Path("~/.cache/mkbc").expanduser()
+QUERY_CACHE_PATH = CACHE_DIR / "query_cache.pkl"
+
+def normalize_query(query):
+    return re.sub(r'\s+', ' ', query.strip().lower())
+
+def quantize_int8(vec):
+    """
+    Quantize an embedding to int8 codes with a per-vector symmetric scale.
+    Returns (codes, weight) where weight = scale / ||vec||, so the cosine similarity of two
+    vectors is approximately dot(codes_a, codes_b) * weight_a * weight_b.
+    """
+    import numpy as np
+
+    max_abs = float(np.abs(vec).max()) if len(vec) else 0.0
+    norm = float(np.linalg.norm(vec))
+    if max_abs == 0 or norm == 0:
+        return np.zeros(len(vec), dtype=np.int8), 0.0
+    scale = max_abs / 127
+    codes = np.clip(np.round(vec / scale), -127, 127).astype(np.int8)
+    return codes, scale / norm
+
+# The MindsDB SDK has no bind-parameter API, so statements are fixed templates with
+# %(name)s placeholders; values go through sql_literal and names through sql_identifier.
+IDENTIFIER_RE = re.compile(r'[A-Za-z_][A-Za-z0-9_.]*')
+FILTER_RE = re.compile(r'([A-Za-z_][A-Za-z0-9_.]*)\s*(>=|<=|=)(.*)')
+
+CREATE_ENGINE_SQL = """
+CREATE ML_ENGINE %(engine)s
+FROM google_gemini
+USING api_key = %(api_key)s;
+"""
+
+CREATE_KB_SQL = """
+CREATE KNOWLEDGE_BASE %(kb)s
+USING
+embedding_model = {
+    "provider": "google_gemini",
+    "engine": "%(engine)s",
+    "model_name": "gemini-2-5-flash"
+},
+reranking_model = {
+    "provider": "google_gemini",
+    "engine": "%(engine)s",
+    "model_name": "gemini-2-5-flash"
+},
+metadata_columns = %(metadata_columns)s,
+content_columns = %(content_columns)s,
+id_column = %(id_column)s;
+"""
+
+# Metadata filters and the match predicate run inside the hits CTE, so the latest-update
+# aggregate only sees an overfetched candidate set instead of every matching row in the KB.
+# MAX(updated_at) per id is the latest metadata value, computed once by a GROUP BY over
+# hits and joined back, rather than by a sorted per-row window.
+SEARCH_HITS_SQL = """%(hits)s AS (
+  SELECT * FROM %(kb)s
+  WHERE %(predicate)s%(filters)s
+    AND relevance_score >= %(rel)s
+  ORDER BY relevance_score DESC
+  LIMIT %(overfetch)s
+)"""
+SEARCH_SELECT_SQL = """SELECT %(qid)sh.id, h.content, m.latest_update, h.relevance_score
+FROM %(hits)s h
+LEFT JOIN (SELECT id, MAX(updated_at) AS latest_update FROM %(hits)s GROUP BY id) m ON h.id = m.id
+ORDER BY h.relevance_score DESC
+LIMIT %(lim)s"""
+SEARCH_OVERFETCH = 3
+
+# `content = ...` is the KB's semantic-match form and is answered from the vector index;
+# `LIKE` is a keyword scan, and hybrid_search blends both rankings server-side.
+SEARCH_PREDICATES = {
+    "semantic": "content = %(q)s",
+    "fts": "content LIKE %(q)s",
+    "hybrid": "content = %(q)s AND hybrid_search = true",
+}
+
+def _specialize(template, **parts):
+    for name, value in parts.items():
+        template = template.replace(f"%({name})s", value)
+    return template
+
+# Search templates specialized per mode once at import, so a search only fills in runtime values.
+SEARCH_HITS_SQL_BY_MODE = {
+    mode: _specialize(SEARCH_HITS_SQL, predicate=predicate)
+    for mode, predicate in SEARCH_PREDICATES.items()
+}
+SEARCH_SQL_BY_MODE = {
+    mode: "\nWITH " + _specialize(hits_sql, hits="hits") + "\n"
+          + _specialize(SEARCH_SELECT_SQL, hits="hits", qid="") + ";\n"
+    for mode, hits_sql in SEARCH_HITS_SQL_BY_MODE.items()
+}
+
+CREATE_INDEX_SQL = "CREATE INDEX ON KNOWLEDGE_BASE %(kb)s"
+
+CREATE_AI_TABLE_SQL = """
+CREATE AI TABLE %(table)s
+AS SELECT %(input_columns)s
+FROM %(source_table)s
+PREDICT %(output_column)s
+USING task = %(task)s;
+"""
+
+QUERY_AI_TABLE_SQL = "SELECT * FROM %(table)s %(where)s LIMIT %(lim)s;"
+
+# Existence probes let re-runs skip DDL that would only fail with "already exists".
+ENGINE_EXISTS_SQL = "SELECT 1 FROM information_schema.ml_engines WHERE name = %(name)s;"
+KB_EXISTS_SQL = "SELECT 1 FROM information_schema.knowledge_bases WHERE name = %(name)s AND project = %(project)s;"
+KB_INDEX_EXISTS_SQL = (
+    "SELECT 1 FROM information_schema.knowledge_bases "
+    "WHERE name = %(name)s AND project = %(project)s AND has_index = 1;"
+)
+
+def sql_identifier(name):
+    if not IDENTIFIER_RE.fullmatch(name):
+        raise ValueError(f"Invalid SQL identifier: {name!r}")
+    return name
+
+def sql_literal(value):
+    if isinstance(value, (int, float)):
+        return repr(value)
+    # MindsDB parses MySQL-dialect strings, where backslash is an escape character,
+    # so backslashes are escaped before quotes are doubled.
+    return "'" + str(value).replace("\\", "\\\\").replace("'", "''") + "'"
+
+def sql_list(values):
+    return "[" + ", ".join(sql_literal(v) for v in values) + "]"
+
+def sql_filters(filters):
+    """
+    Render metadata filters, keyed by (column, operator), as additional AND conditions.
+    """
+    return "".join(f" AND {sql_identifier(k)} {op} {sql_literal(v)}" for (k, op), v in sorted(filters.items()))
+
+def _filter_value(value):
+    """
+    Parse a filter value as a number when it looks like one, so it is compared unquoted.
+    """
+    for cast in (int, float):
+        try:
+            number = cast(value)
+        except ValueError:
+            continue
+        if math.isfinite(number):  # keep "nan"/"inf" as strings
+            return number
+    return value
+
+def parse_filters(spec):
+    """
+    Parse a `key<op>value[,key<op>value]` metadata filter argument, where <op> is =, >= or <=,
+    into a dict keyed by (key, op).
+    """
+    filters = {}
+    for pair in spec.split(","):
+        match = FILTER_RE.fullmatch(pair.strip())
+        if not match:
+            raise argparse.ArgumentTypeError(f"Invalid filter {pair!r}, expected key=value, key>=value or key<=value")
+        key, op, value = match.groups()
+        filters[(key, op)] = _filter_value(value.strip())
+    return filters
+
+def _import_mindsdb_sdk():
+    global MindsDB, MindsDBException
+    if MindsDB is None:
+        from mindsdb_sdk import MindsDB
+        from mindsdb_sdk.exceptions import MindsDBException
+
 class MindsDBGeminiKBCLI:
-    def __init__(self, api_key, project=None):
+    def __init__(self, api_key, project=None, gemini_api_key=None,
+                 use_cache=True, sem_cache_threshold=DEFAULT_SEM_CACHE_THRESHOLD, cache_ttl=DEFAULT_CACHE_TTL):
         self.api_key = api_key
         self.project = project
+        _import_mindsdb_sdk()
         self.client = MindsDB(api_key=api_key)
+        self._install_pooled_session()
         if project:
             self.project_obj = self.client.projects.get(project)
         else:
             self.project_obj = None
+        self._qualify = functools.lru_cache(maxsize=128)(self._qualify_name)
 
-    def create_gemini_engine(self, engine_name: str, gemini_api_key: str):
-        logging.info(f"Creating Gemini ML engine '{engine_name}'...")
-        create_engine_sql = f"""
-        CREATE ML_ENGINE {engine_name}
-        FROM google_gemini
-        USING api_key = '{gemini_api_key}';
+        # Two-tier search cache: exact match on the normalized key, then
+        # cosine similarity against locally embedded previous queries.
+        # Entries expire after `cache_ttl` seconds, since the KB can change through other
+        # clients. Persisted to QUERY_CACHE_PATH by save_query_cache() so hits carry across
+        # CLI invocations.
+        self.gemini_api_key = gemini_api_key
+        self.use_cache = use_cache
+        self.sem_cache_threshold = sem_cache_threshold
+        self.cache_ttl = cache_ttl
+        self._exact_cache = OrderedDict()
+        self._sem_cache = OrderedDict()
+        self._sem_matrix = None
+        self._sem_weights = None
+        self._sem_keys = []
+        self._genai = None
+        self._cache_loaded = False
+        self._cache_dirty = False
+
+    def _install_pooled_session(self):
+        """
+        Mount a keep-alive, pooled HTTP adapter on the SDK's requests session so every
+        query and ingest call reuses open TLS connections instead of reconnecting.
+        """
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+
+        class KeepAliveHTTPAdapter(HTTPAdapter):
+            def init_poolmanager(self, *args, **kwargs):
+                kwargs["socket_options"] = HTTP_SOCKET_OPTIONS
+                super().init_poolmanager(*args, **kwargs)
+
+        session = None
+        for owner in (self.client, getattr(self.client, "api", None)):
+            for attr in ("session", "_session"):
+                if isinstance(getattr(owner, attr, None), requests.Session):
+                    session = getattr(owner, attr)
+                    break
+            if session is not None:
+                break
+        if session is None:
+            logging.warning("No requests session found on the MindsDB client; HTTP connection pooling is disabled.")
+            return
+
+        # MindsDB SQL calls are POSTs, which are not safe to replay after the server has seen
+        # them (a retried insert would duplicate rows), so only failed connects are retried.
+        # Rate limiting on inserts is handled by _submit_insert.
+        adapter = KeepAliveHTTPAdapter(
+            pool_connections=HTTP_POOL_CONNECTIONS,
+            pool_maxsize=HTTP_POOL_MAXSIZE,
+            max_retries=Retry(total=5, connect=5, read=0, status=0, backoff_factor=0.3)
+        )
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+
+    def _qualify_name(self, name):
+        return f"{self.project}.{name}" if self.project else name
+
+    def _exists(self, probe_sql):
+        """
+        Run an information_schema probe; any failure counts as "not found" so the DDL still runs.
         """
+        try:
+            return len(materialize_result(self.client.query(probe_sql))) > 0
+        except MindsDBException as e:
+            logging.debug("Existence probe failed, assuming object is missing: %s", e)
+            return False
+
+    def _kb_probe_params(self, kb_name):
+        return {"name": sql_literal(kb_name), "project": sql_literal(self.project or DEFAULT_PROJECT)}
+
+    def create_gemini_engine(self, engine_name: str, gemini_api_key: str):
+        if self._exists(ENGINE_EXISTS_SQL % {"name": sql_literal(engine_name)}):
+            logging.info("Gemini ML engine '%s' already exists, skipping creation.", engine_name)
+            return
+
+        logging.info("Creating Gemini ML engine '%s'...", engine_name)
+        create_engine_sql = CREATE_ENGINE_SQL % {
+            "engine": sql_identifier(engine_name),
+            "api_key": sql_literal(gemini_api_key),
+        }
         try:
             self.client.query(create_engine_sql)
-            logging.info(f"Gemini ML engine '{engine_name}' created successfully.")
+            logging.info("Gemini ML engine '%s' created successfully.", engine_name)
         except MindsDBException as e:
             if "already exists" in str(e).lower():
-                logging.warning(f"Gemini ML engine '{engine_name}' already exists.")
+                logging.warning("Gemini ML engine '%s' already exists.", engine_name)
             else:
-                logging.error(f"Failed to create Gemini ML engine: {e}")
+                logging.error("Failed to create Gemini ML engine: %s", e)
                 raise
 
     def create_knowledge_base(self, kb_name, engine_name,
@@ -39,151 +336,947 @@ class MindsDBGeminiKBCLI:
                               id_column="id"):
         metadata_columns = metadata_columns or []
         content_columns = content_columns or ["content"]
-        full_kb_name = f"{self.project}.{kb_name}" if self.project else kb_name
-
-        logging.info(f"Creating knowledge base '{full_kb_name}' with Gemini engine '{engine_name}'...")
-
-        create_kb_sql = f"""
-        CREATE KNOWLEDGE_BASE {full_kb_name}
-        USING
-        embedding_model = {{
-            "provider": "google_gemini",
-            "engine": "{engine_name}",
-            "model_name": "gemini-2-5-flash"
-        }},
-        reranking_model = {{
-            "provider": "google_gemini",
-            "engine": "{engine_name}",
-            "model_name": "gemini-2-5-flash"
-        }},
-        metadata_columns = {metadata_columns},
-        content_columns = {content_columns},
-        id_column = '{id_column}';
-        """
+        full_kb_name = self._qualify(kb_name)
+
+        if self._exists(KB_EXISTS_SQL % self._kb_probe_params(kb_name)):
+            logging.info("Knowledge base '%s' already exists, skipping creation.", full_kb_name)
+            return
+
+        logging.info("Creating knowledge base '%s' with Gemini engine '%s'...", full_kb_name, engine_name)
+
+        create_kb_sql = CREATE_KB_SQL % {
+            "kb": sql_identifier(full_kb_name),
+            "engine": sql_identifier(engine_name),
+            "metadata_columns": sql_list(metadata_columns),
+            "content_columns": sql_list(content_columns),
+            "id_column": sql_literal(id_column),
+        }
 
         try:
             self.client.query(create_kb_sql)
-            logging.info(f"Knowledge base '{full_kb_name}' created successfully.")
+            logging.info("Knowledge base '%s' created successfully.", full_kb_name)
         except MindsDBException as e:
             if "already exists" in str(e).lower():
-                logging.warning(f"Knowledge base '{full_kb_name}' already exists.")
+                logging.warning("Knowledge base '%s' already exists.", full_kb_name)
             else:
-                logging.error(f"Failed to create knowledge base: {e}")
+                logging.error("Failed to create knowledge base: %s", e)
                 raise
 
-    def insert_data_with_job(self, kb_name, df: pd.DataFrame):
+    def insert_data_with_job(self, kb_name, df: "pd.DataFrame", batch_size=DEFAULT_INSERT_BATCH_SIZE,
+                             workers=DEFAULT_INGEST_WORKERS):
         """
-        Insert data asynchronously using MindsDB JOB mechanism.
+        Insert data asynchronously using MindsDB JOB mechanism, running up to `workers` row batches concurrently.
         """
-        full_kb_name = f"{self.project}.{kb_name}" if self.project else kb_name
-        logging.info(f"Starting async data ingestion job for knowledge base '{full_kb_name}' with {len(df)} rows...")
+        full_kb_name = self._qualify(kb_name)
+        logging.info("Starting async data ingestion job for knowledge base '%s' with %d rows in batches of %s...", full_kb_name, len(df), batch_size)
 
         try:
             kb = self.client.knowledge_bases.get(full_kb_name)
-            job = kb.insert(df, async_mode=True)
-            logging.info(f"Job {job.id} started for data ingestion.")
-            job.wait()  # Wait for job completion; remove or adjust for non-blocking
-            logging.info(f"Job {job.id} completed with status: {job.status}")
-        except MindsDBException as e:
-            logging.error(f"Failed to insert data with job: {e}")
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                futures = [
+                    pool.submit(self._insert_batch, kb, df.iloc[start:start + batch_size], start)
+                    for start in range(0, len(df), batch_size)
+                ]
+                for future in as_completed(futures):
+                    future.result()
+        except (MindsDBException, RuntimeError) as e:
+            logging.error("Failed to insert data with job: %s", e)
             raise
+        self.invalidate_search_cache(kb_name)
+
+    def _insert_batch(self, kb, batch, start):
+        """
+        Insert one row batch as a JOB and wait for it.
+        """
+        job = self._submit_insert(kb, batch, start)
+        job.wait()
+        return self._check_job(job)
+
+    def _submit_insert(self, kb, batch, start):
+        """
+        Start a JOB for one row batch, backing off when the provider rate-limits.
+        """
+        for attempt in range(INSERT_MAX_RETRIES + 1):
+            try:
+                job = kb.insert(batch, async_mode=True)
+                logging.info("Job %s started for rows %s-%s.", job.id, start, start + len(batch) - 1)
+                return job
+            except MindsDBException as e:
+                if "429" not in str(e) or attempt == INSERT_MAX_RETRIES:
+                    raise
+                delay = 2 ** attempt + random.random()
+                logging.warning("Rate limited inserting rows %s-%s, retrying in %.1fs...", start, start + len(batch) - 1, delay)
+                time.sleep(delay)
 
     def create_index_with_job(self, kb_name):
         """
         Create index asynchronously using MindsDB JOB.
         """
-        full_kb_name = f"{self.project}.{kb_name}" if self.project else kb_name
-        logging.info(f"Starting async index creation job for knowledge base '{full_kb_name}'...")
+        full_kb_name = self._qualify(kb_name)
+
+        if self._exists(KB_INDEX_EXISTS_SQL % self._kb_probe_params(kb_name)):
+            logging.info("Index on knowledge base '%s' already exists, skipping creation.", full_kb_name)
+            return
+
+        logging.info("Starting async index creation job for knowledge base '%s'...", full_kb_name)
 
         try:
-            job = self.client.query_async(f"CREATE INDEX ON KNOWLEDGE_BASE {full_kb_name}")
-            logging.info(f"Job {job.id} started for index creation.")
+            job = self.client.query_async(CREATE_INDEX_SQL % {"kb": sql_identifier(full_kb_name)})
+            logging.info("Job %s started for index creation.", job.id)
             job.wait()
-            logging.info(f"Job {job.id} completed with status: {job.status}")
+            self._check_job(job)
         except MindsDBException as e:
-            logging.error(f"Failed to create index with job: {e}")
+            if "already exists" in str(e).lower():
+                logging.warning("Index on knowledge base '%s' already exists.", full_kb_name)
+            else:
+                logging.error("Failed to create index with job: %s", e)
+                raise
+
+    def _check_job(self, job):
+        """
+        Log a finished JOB, raising RuntimeError if it reports a failure status.
+        """
+        if str(job.status).lower() in JOB_FAILED_STATUSES:
+            raise RuntimeError(f"Job {job.id} finished with status: {job.status}")
+        logging.info("Job %s completed with status: %s", job.id, job.status)
+        return job
+
+    async def _await_job(self, job):
+        """
+        Poll a JOB without blocking the event loop, backing off from 0.5 s to 5 s between polls.
+        Jobs without refresh() are waited on in a worker thread. Raises RuntimeError if the JOB
+        reports a failure status.
+        """
+        if hasattr(job, "refresh"):
+            delay = JOB_POLL_INITIAL_DELAY
+            while True:
+                await asyncio.to_thread(job.refresh)
+                if str(job.status).lower() not in JOB_ACTIVE_STATUSES:
+                    break
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, JOB_POLL_MAX_DELAY)
+        else:
+            await asyncio.to_thread(job.wait)
+        return self._check_job(job)
+
+    async def ainsert_data_with_job(self, kb_name, df: "pd.DataFrame", batch_size=DEFAULT_INSERT_BATCH_SIZE,
+                                    workers=DEFAULT_INGEST_WORKERS, limiter=None):
+        """
+        Async variant of insert_data_with_job: JOBs are polled on the event loop instead of blocking in job.wait().
+        Pass a shared `limiter` semaphore to cap in-flight JOBs across several concurrent calls.
+        """
+        full_kb_name = self._qualify(kb_name)
+        logging.info("Starting async data ingestion job for knowledge base '%s' with %d rows in batches of %s...", full_kb_name, len(df), batch_size)
+
+        limiter = limiter or asyncio.Semaphore(workers)
+
+        async def insert_batch(start):
+            async with limiter:
+                batch = df.iloc[start:start + batch_size]
+                job = await asyncio.to_thread(self._submit_insert, kb, batch, start)
+                await self._await_job(job)
+
+        try:
+            kb = await asyncio.to_thread(self.client.knowledge_bases.get, full_kb_name)
+            await asyncio.gather(*(insert_batch(start) for start in range(0, len(df), batch_size)))
+        except (MindsDBException, RuntimeError) as e:
+            logging.error("Failed to insert data with job: %s", e)
             raise
+        self.invalidate_search_cache(kb_name)
+
+    async def acreate_index_with_job(self, kb_name):
+        """
+        Async variant of create_index_with_job that polls the JOB on the event loop.
+        """
+        full_kb_name = self._qualify(kb_name)
+
+        if await asyncio.to_thread(self._exists, KB_INDEX_EXISTS_SQL % self._kb_probe_params(kb_name)):
+            logging.info("Index on knowledge base '%s' already exists, skipping creation.", full_kb_name)
+            return
+
+        logging.info("Starting async index creation job for knowledge base '%s'...", full_kb_name)
+
+        try:
+            job = await asyncio.to_thread(
+                self.client.query_async, CREATE_INDEX_SQL % {"kb": sql_identifier(full_kb_name)}
+            )
+            logging.info("Job %s started for index creation.", job.id)
+            await self._await_job(job)
+        except MindsDBException as e:
+            if "already exists" in str(e).lower():
+                logging.warning("Index on knowledge base '%s' already exists.", full_kb_name)
+            else:
+                logging.error("Failed to create index with job: %s", e)
+                raise
+
+    def semantic_search(self, kb_name, query, limit=10, relevance_threshold=0.5, search_mode="semantic",
+                        filters=None):
+        """
+        Semantic search with a local exact + semantic query cache in front of the remote KB.
+        `filters` maps (metadata column, operator) pairs to values and is applied before ranking.
+        New cache entries are written to disk by save_query_cache().
+        """
+        filters = filters or {}
+        if not self.use_cache:
+            return self._run_semantic_search(kb_name, query, limit, relevance_threshold, search_mode, filters)
+
+        self._load_query_cache()
+        key = self._search_key(kb_name, query, limit, relevance_threshold, search_mode, filters)
+        cached, query_vec = self._cache_lookup(key)
+        if cached is not None:
+            return cached
+
+        result = self._run_semantic_search(kb_name, query, limit, relevance_threshold, search_mode, filters)
+        self._cache_result(key, query_vec, result)
+        return result
+
+    def semantic_search_batch(self, kb_name, queries, limit=10, relevance_threshold=0.5, search_mode="semantic",
+                              filters=None):
+        """
+        Run several searches in a single UNION ALL statement, returning one result per query in order.
+        Queries answered by the local cache are left out of the statement.
+        """
+        filters = filters or {}
+        if self.use_cache:
+            self._load_query_cache()
+        results = [None] * len(queries)
+        misses = []
+        if self.use_cache:
+            keys = [self._search_key(kb_name, query, limit, relevance_threshold, search_mode, filters)
+                    for query in queries]
+            unresolved = []
+            for i, key in enumerate(keys):
+                results[i] = self._exact_cache_get(key)
+                if results[i] is None:
+                    unresolved.append(i)
+            # Every query the exact tier missed is embedded in one request.
+            query_vecs = self._embed_queries([keys[i][1] for i in unresolved])
+            for i, query_vec in zip(unresolved, query_vecs):
+                cached, query_vec = self._cache_lookup(keys[i], query_vec)
+                if cached is not None:
+                    results[i] = cached
+                else:
+                    misses.append((i, keys[i], query_vec))
+        else:
+            misses = [(i, None, None) for i in range(len(queries))]
+
+        if misses:
+            fetched = self._run_semantic_search_batch(
+                kb_name, [queries[i] for i, _, _ in misses], limit, relevance_threshold, search_mode, filters
+            )
+            for (i, key, query_vec), result in zip(misses, fetched):
+                results[i] = result
+                if key is not None:
+                    self._cache_result(key, query_vec, result)
+        return results
+
+    def _search_key(self, kb_name, query, limit, relevance_threshold, search_mode, filters):
+        return (self._qualify(kb_name), normalize_query(query), limit, relevance_threshold, search_mode,
+                tuple(sorted(filters.items())))
+
+    def _load_query_cache(self):
+        """
+        Load the persisted search cache once per instance; a missing or unreadable file starts empty.
+        """
+        if self._cache_loaded:
+            return
+        self._cache_loaded = True
+        try:
+            with open(QUERY_CACHE_PATH, "rb") as f:
+                cache_format, exact_cache, sem_cache = pickle.load(f)
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            logging.warning("Ignoring unreadable query cache '%s': %s", QUERY_CACHE_PATH, e)
+            return
+        if cache_format != QUERY_CACHE_FORMAT:
+            logging.warning("Ignoring query cache '%s' written in an older format.", QUERY_CACHE_PATH)
+            return
+        self._exact_cache, self._sem_cache = exact_cache, sem_cache
+        self._sem_matrix = None
+        self._drop_expired()
+
+    def save_query_cache(self):
+        """
+        Write the search cache to QUERY_CACHE_PATH if it changed since it was loaded or last saved.
+        """
+        if not self.use_cache or not self._cache_dirty:
+            return
+        tmp_path = QUERY_CACHE_PATH.with_suffix(f".{os.getpid()}.tmp")
+        try:
+            QUERY_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+            with open(tmp_path, "wb") as f:
+                pickle.dump((QUERY_CACHE_FORMAT, self._exact_cache, self._sem_cache), f,
+                            protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, QUERY_CACHE_PATH)
+            self._cache_dirty = False
+        except Exception as e:
+            logging.warning("Failed to persist query cache '%s': %s", QUERY_CACHE_PATH, e)
+
+    def _is_expired(self, stored_at):
+        return time.time() - stored_at > self.cache_ttl
+
+    def _drop_expired(self):
+        """
+        Remove entries older than cache_ttl from both tiers, so the file on disk stays bounded.
+        """
+        expired = [key for key, (stored_at, _) in self._exact_cache.items() if self._is_expired(stored_at)]
+        expired_sem = [key for key, entry in self._sem_cache.items() if self._is_expired(entry[3])]
+        for key in expired:
+            del self._exact_cache[key]
+        for key in expired_sem:
+            del self._sem_cache[key]
+        if expired or expired_sem:
+            self._sem_matrix = None
+            self._cache_dirty = True
+
+    def invalidate_search_cache(self, kb_name):
+        """
+        Drop cached searches against a knowledge base whose contents just changed.
+        """
+        if not self.use_cache:
+            return
+        self._load_query_cache()
+        full_kb_name = self._qualify(kb_name)
+        stale = [key for key in self._exact_cache if key[0] == full_kb_name]
+        stale_sem = [key for key in self._sem_cache if key[0] == full_kb_name]
+        if not stale and not stale_sem:
+            return
+        for key in stale:
+            del self._exact_cache[key]
+        for key in stale_sem:
+            del self._sem_cache[key]
+        self._sem_matrix = None
+        # Saved right away so that a later failure in this run cannot leave stale results on disk.
+        self._cache_dirty = True
+        self.save_query_cache()
+
+    def _exact_cache_get(self, key):
+        """
+        Return the unexpired exact-tier result for a search, or None.
+        """
+        entry = self._exact_cache.get(key)
+        if entry is None:
+            return None
+        stored_at, result = entry
+        if self._is_expired(stored_at):
+            del self._exact_cache[key]
+            self._cache_dirty = True
+            return None
+        self._exact_cache.move_to_end(key)
+        logging.info("Query cache hit (exact) for: %s", key[1])
+        return result
 
-    def semantic_search(self, kb_name, query, limit=10, relevance_threshold=0.5):
-        full_kb_name = f"{self.project}.{kb_name}" if self.project else kb_name
-        logging.info(f"Performing semantic search on '{full_kb_name}' for query: {query}")
+    def _cache_lookup(self, key, query_vec=None):
+        """
+        Look a search up in the exact, then semantic cache tier, embedding the query
+        unless a precomputed `query_vec` is given.
+        Returns (cached result or None, query embedding or None).
+        """
+        cached = self._exact_cache_get(key)
+        if cached is not None:
+            return cached, None
 
-        query_escaped = query.replace("'", "''")
+        if query_vec is None:
+            query_vec = self._embed_query(key[1])
+        if query_vec is not None:
+            cached = self._semantic_cache_lookup(key, query_vec)
+            if cached is not None:
+                return cached, query_vec
+        return None, query_vec
 
-        # Example: using LAST_VALUE window function on a metadata column 'updated_at' to get latest metadata per id
-        sql = f"""
-        SELECT id, content,
-          LAST_VALUE(updated_at) OVER (PARTITION BY id ORDER BY updated_at ROWS BETWEEN UNBOUNDED PRECEDING AND UNBOUNDED FOLLOWING) AS latest_update,
-          relevance_score
-        FROM {full_kb_name}
-        WHERE content LIKE '{query_escaped}'
-          AND relevance_score >= {relevance_threshold}
-        ORDER BY relevance_score DESC
-        LIMIT {limit};
+    def _embed_query(self, normalized_query):
+        """
+        Embed a query locally with Gemini; returns None when the semantic tier is unavailable.
+        """
+        return self._embed_queries([normalized_query])[0]
+
+    def _embed_queries(self, normalized_queries):
+        """
+        Embed several queries with one Gemini request per EMBED_BATCH_SIZE queries.
+        Returns one vector per query, all None when the semantic tier is unavailable.
         """
+        if not self.gemini_api_key or not normalized_queries:
+            return [None] * len(normalized_queries)
+        import numpy as np
 
         try:
-            result = self.client.query(sql)
-            if not result or len(result) == 0:
+            if self._genai is None:
+                import google.generativeai as genai
+                genai.configure(api_key=self.gemini_api_key)
+                self._genai = genai
+            vectors = []
+            for start in range(0, len(normalized_queries), EMBED_BATCH_SIZE):
+                batch = normalized_queries[start:start + EMBED_BATCH_SIZE]
+                response = self._genai.embed_content(model=QUERY_EMBEDDING_MODEL, content=batch)
+                vectors.extend(np.asarray(vector, dtype=np.float32) for vector in response["embedding"])
+            return vectors
+        except Exception as e:
+            logging.warning("Semantic query cache disabled, failed to embed query: %s", e)
+            self.gemini_api_key = None
+            return [None] * len(normalized_queries)
+
+    def _semantic_cache_lookup(self, key, query_vec):
+        import numpy as np
+
+        if not self._sem_cache:
+            return None
+        if self._sem_matrix is None:
+            self._sem_keys = list(self._sem_cache)
+            self._sem_matrix = np.stack([self._sem_cache[k][0] for k in self._sem_keys])
+            self._sem_weights = np.array([self._sem_cache[k][1] for k in self._sem_keys], dtype=np.float32)
+
+        query_codes, query_weight = quantize_int8(query_vec)
+        if query_weight == 0:
+            return None
+        # The int8 matrix is upcast to float32 a block of rows at a time, so each lookup runs
+        # cache-sized sgemv calls without an N x D copy. Products of int8 codes sum exactly in
+        # float32 for embeddings up to ~1000 dimensions.
+        query_codes = query_codes.astype(np.float32)
+        dots = np.empty(len(self._sem_matrix), dtype=np.float32)
+        for start in range(0, len(dots), SEM_CACHE_BLOCK_ROWS):
+            stop = start + SEM_CACHE_BLOCK_ROWS
+            np.matmul(self._sem_matrix[start:stop], query_codes, out=dots[start:stop])
+        sims = dots * self._sem_weights * query_weight
+
+        # Only entries that differ from this search in the query text alone are reusable.
+        for idx in np.argsort(sims)[::-1]:
+            if sims[idx] < self.sem_cache_threshold:
+                break
+            cached_key = self._sem_keys[idx]
+            if self._is_expired(self._sem_cache[cached_key][3]):
+                continue
+            if cached_key[:1] + cached_key[2:] == key[:1] + key[2:]:
+                self._sem_cache.move_to_end(cached_key)
+                logging.info("Query cache hit (semantic, similarity %.3f) for: %s", sims[idx], key[1])
+                return self._sem_cache[cached_key][2]
+        return None
+
+    def _cache_result(self, key, query_vec, result):
+        stored_at = time.time()
+        self._cache_dirty = True
+        self._exact_cache[key] = (stored_at, result)
+        if len(self._exact_cache) > EXACT_CACHE_SIZE:
+            self._exact_cache.popitem(last=False)
+
+        if query_vec is None:
+            return
+        self._sem_cache[key] = (*quantize_int8(query_vec), result, stored_at)
+        self._sem_cache.move_to_end(key)
+        if len(self._sem_cache) > SEMANTIC_CACHE_SIZE:
+            self._sem_cache.popitem(last=False)
+        self._sem_matrix = None
+
+    def _run_semantic_search(self, kb_name, query, limit, relevance_threshold, search_mode="semantic",
+                             filters=None):
+        full_kb_name = self._qualify(kb_name)
+        logging.info("Performing %s search on '%s' for query: %s", search_mode, full_kb_name, query)
+
+        sql = SEARCH_SQL_BY_MODE[search_mode] % {
+            "kb": sql_identifier(full_kb_name),
+            "q": sql_literal(query),
+            "filters": sql_filters(filters or {}),
+            "rel": float(relevance_threshold),
+            "overfetch": SEARCH_OVERFETCH * int(limit),
+            "lim": int(limit),
+        }
+
+        try:
+            result = materialize_result(self.client.query(sql))
+            if len(result) == 0:
                 logging.info("No results found.")
-                return []
             return result
         except MindsDBException as e:
-            logging.error(f"Search query failed: {e}")
+            logging.error("Search query failed: %s", e)
+            raise
+
+    def _run_semantic_search_batch(self, kb_name, queries, limit, relevance_threshold, search_mode="semantic",
+                                   filters=None):
+        full_kb_name = self._qualify(kb_name)
+        logging.info("Performing %s search on '%s' for %d queries in one statement", search_mode, full_kb_name, len(queries))
+
+        values = {
+            "kb": sql_identifier(full_kb_name),
+            "filters": sql_filters(filters or {}),
+            "rel": float(relevance_threshold),
+            "overfetch": SEARCH_OVERFETCH * int(limit),
+            "lim": int(limit),
+        }
+        qids = [f"q{i}" for i in range(len(queries))]
+        hits = [
+            SEARCH_HITS_SQL_BY_MODE[search_mode] % {**values, "hits": f"hits_{i}", "q": sql_literal(query)}
+            for i, query in enumerate(queries)
+        ]
+        selects = [
+            "(" + SEARCH_SELECT_SQL % {**values, "hits": f"hits_{i}", "qid": f"{sql_literal(qid)} AS qid, "} + ")"
+            for i, qid in enumerate(qids)
+        ]
+        sql = "\nWITH " + ",\n".join(hits) + "\n" + "\nUNION ALL\n".join(selects) + ";\n"
+
+        try:
+            result = materialize_result(self.client.query(sql))
+            if len(result) == 0:
+                logging.info("No results found.")
+            return split_by_qid(result, qids)
+        except MindsDBException as e:
+            logging.error("Batch search query failed: %s", e)
             raise
 
     def create_ai_table(self, ai_table_name, source_table, task_type, input_columns, output_column):
         """
         Create an AI Table for tasks like summarization, classification, or generation.
         """
-        full_ai_table_name = f"{self.project}.{ai_table_name}" if self.project else ai_table_name
-        logging.info(f"Creating AI Table '{full_ai_table_name}' for task '{task_type}'...")
+        full_ai_table_name = self._qualify(ai_table_name)
+        logging.info("Creating AI Table '%s' for task '%s'...", full_ai_table_name, task_type)
 
-        input_cols_str = ", ".join(input_columns)
-
-        create_ai_table_sql = f"""
-        CREATE AI TABLE {full_ai_table_name}
-        AS SELECT {input_cols_str}
-        FROM {source_table}
-        PREDICT {output_column}
-        USING task = '{task_type}';
-        """
+        create_ai_table_sql = CREATE_AI_TABLE_SQL % {
+            "table": sql_identifier(full_ai_table_name),
+            "input_columns": ", ".join(sql_identifier(column) for column in input_columns),
+            "source_table": sql_identifier(source_table),
+            "output_column": sql_identifier(output_column),
+            "task": sql_literal(task_type),
+        }
 
         try:
             self.client.query(create_ai_table_sql)
-            logging.info(f"AI Table '{full_ai_table_name}' created successfully.")
+            logging.info("AI Table '%s' created successfully.", full_ai_table_name)
         except MindsDBException as e:
             if "already exists" in str(e).lower():
-                logging.warning(f"AI Table '{full_ai_table_name}' already exists.")
+                logging.warning("AI Table '%s' already exists.", full_ai_table_name)
             else:
-                logging.error(f"Failed to create AI Table: {e}")
+                logging.error("Failed to create AI Table: %s", e)
                 raise
 
     def query_ai_table(self, ai_table_name, query_filter=None, limit=10):
-        full_ai_table_name = f"{self.project}.{ai_table_name}" if self.project else ai_table_name
-        logging.info(f"Querying AI Table '{full_ai_table_name}'...")
+        full_ai_table_name = self._qualify(ai_table_name)
+        logging.info("Querying AI Table '%s'...", full_ai_table_name)
 
-        where_clause = f"WHERE {query_filter}" if query_filter else ""
-        sql = f"SELECT * FROM {full_ai_table_name} {where_clause} LIMIT {limit};"
+        sql = QUERY_AI_TABLE_SQL % {
+            "table": sql_identifier(full_ai_table_name),
+            "where": f"WHERE {query_filter}" if query_filter else "",
+            "lim": int(limit),
+        }
 
         try:
-            result = self.client.query(sql)
-            if not result or len(result) == 0:
+            result = materialize_result(self.client.query(sql))
+            if len(result) == 0:
                 logging.info("No AI Table results found.")
-                return []
             return result
         except MindsDBException as e:
-            logging.error(f"Failed to query AI Table: {e}")
+            logging.error("Failed to query AI Table: %s", e)
             raise
 
-def load_csv(input_file):
+def materialize_result(result):
+    """
+    Fetch a query result once into a pyarrow.Table (a list of rows when PyArrow is unavailable),
+    so callers and the search cache never re-iterate a lazy SDK cursor.
+    """
+    if result is None:
+        return []
     try:
-        df = pd.read_csv(input_file)
-        logging.info(f"Loaded {len(df)} rows from '{input_file}'.")
-        return df
+        import pyarrow as pa
+    except ImportError:
+        pa = None
+
+    if pa is not None and hasattr(result, "to_arrow"):
+        return result.to_arrow()
+    if hasattr(result, "fetch"):
+        result = result.fetch()
+    elif hasattr(result, "fetch_all"):
+        result = result.fetch_all()
+
+    # Columns that Arrow cannot type (e.g. mixed ints and strings from a user table) keep
+    # the plain list-of-rows form instead of failing the query.
+    if hasattr(result, "to_dict"):  # pandas DataFrame
+        if pa is not None:
+            try:
+                return pa.Table.from_pandas(result, preserve_index=False)
+            except (pa.ArrowInvalid, pa.ArrowTypeError) as e:
+                logging.debug("Keeping query result as rows, Arrow conversion failed: %s", e)
+        return result.to_dict("records")
+    rows = list(result)
+    if pa is not None and all(isinstance(row, dict) for row in rows):
+        try:
+            return pa.Table.from_pylist(rows)
+        except (pa.ArrowInvalid, pa.ArrowTypeError) as e:
+            logging.debug("Keeping query result as rows, Arrow conversion failed: %s", e)
+    return rows
+
+def split_by_qid(result, qids):
+    """
+    Split a batched search result into one result per qid, dropping the qid column.
+    """
+    if hasattr(result, "schema"):
+        import pyarrow.compute as pc
+
+        if "qid" not in result.column_names:  # no rows at all, so no columns either
+            return [result.slice(0, 0) for _ in qids]
+        rest = result.select([name for name in result.column_names if name != "qid"])
+        return [rest.filter(pc.equal(result["qid"], qid)) for qid in qids]
+    return [
+        [{k: v for k, v in row.items() if k != "qid"} for row in result if row.get("qid") == qid]
+        for qid in qids
+    ]
+
+def print_results(title, results, output_format="table"):
+    if output_format == "csv" and hasattr(results, "schema"):
+        import pyarrow.csv as pacsv
+
+        sys.stdout.flush()
+        pacsv.write_csv(results, sys.stdout.buffer)
+        return
+
+    print(title)
+    if hasattr(results, "schema"):
+        # Aligned columns formatted straight from the Arrow rows, so printing never imports pandas.
+        columns = results.column_names
+        rows = [["" if value is None else str(value) for value in row.values()] for row in results.to_pylist()]
+        widths = [max([len(name)] + [len(row[i]) for row in rows]) for i, name in enumerate(columns)]
+        for row in [columns] + rows:
+            print("  ".join(cell.rjust(width) for cell, width in zip(row, widths)))
+    else:
+        for row in results:
+            print(row)
+
+def csv_cache_path(input_file):
+    """
+    Arrow IPC cache location for a CSV, named `<path hash>-<version hash>.arrow` from its
+    absolute path and its size and mtime, so that editing the CSV invalidates the cache.
+    """
+    stat = os.stat(input_file)
+    path_hash = hashlib.sha256(os.path.abspath(input_file).encode()).hexdigest()[:32]
+    version_hash = hashlib.sha256(f"{stat.st_size}:{stat.st_mtime_ns}".encode()).hexdigest()[:16]
+    return CACHE_DIR / "csv" / f"{path_hash}-{version_hash}.arrow"
+
+def prune_csv_cache(cache_path):
+    """
+    Delete cache entries for earlier versions of the same CSV, keeping `cache_path`.
+    """
+    path_hash = cache_path.stem.split("-", 1)[0]
+    for stale in cache_path.parent.glob(f"{path_hash}-*.arrow"):
+        if stale != cache_path:
+            try:
+                stale.unlink()
+            except OSError as e:
+                logging.debug("Could not remove stale CSV cache '%s': %s", stale, e)
+
+def rebatch_rows(batches, chunksize):
+    """
+    Regroup Arrow record batches into tables of `chunksize` rows (the last may be shorter),
+    slicing without copying the underlying buffers.
+    """
+    import pyarrow as pa
+
+    pending, pending_rows = [], 0
+    for batch in batches:
+        while len(batch):
+            take = min(chunksize - pending_rows, len(batch))
+            pending.append(batch.slice(0, take))
+            pending_rows += take
+            batch = batch.slice(take)
+            if pending_rows == chunksize:
+                yield pa.Table.from_batches(pending)
+                pending, pending_rows = [], 0
+    if pending:
+        yield pa.Table.from_batches(pending)
+
+def iter_csv(input_file, chunksize=DEFAULT_CSV_CHUNKSIZE, use_ipc_cache=False):
+    """
+    Stream a CSV as DataFrame chunks instead of materializing the whole file.
+    Uses PyArrow's multithreaded streaming reader when available, regrouping its blocks into
+    `chunksize`-row chunks, and resumes with pandas' chunked reader at the first row PyArrow
+    cannot parse.
+    With `use_ipc_cache`, a fully Arrow-parsed CSV is also written to an Arrow IPC file that
+    later runs memory-map instead of parsing the CSV again.
+    """
+    import pandas as pd
+
+    rows_read = 0
+    try:
+        import pyarrow as pa
+        import pyarrow.csv as pacsv
+    except ImportError:
+        pa = None
+
+    if pa is not None:
+        cache_path = csv_cache_path(input_file) if use_ipc_cache else None
+        if cache_path is not None and cache_path.exists():
+            logging.info("Reading '%s' from Arrow IPC cache '%s'.", input_file, cache_path)
+            reader = pa.ipc.open_file(pa.memory_map(str(cache_path)))
+            batches = (reader.get_batch(i) for i in range(reader.num_record_batches))
+            for table in rebatch_rows(batches, chunksize):
+                chunk = table.to_pandas(types_mapper=pd.ArrowDtype)
+                chunk.index += rows_read
+                rows_read += len(chunk)
+                yield chunk
+            return
+
+        writer = None
+        tmp_path = None
+        parse_errors = []
+
+        def parsed_batches():
+            # Stops at the first unparseable block; rows already regrouped are still yielded.
+            try:
+                for batch in reader:
+                    if writer is not None:
+                        writer.write_batch(batch)
+                    yield batch
+            except pa.lib.ArrowInvalid as e:
+                parse_errors.append(e)
+
+        try:
+            reader = pacsv.open_csv(
+                input_file,
+                read_options=pacsv.ReadOptions(use_threads=True, block_size=ARROW_CSV_BLOCK_SIZE)
+            )
+            if cache_path is not None:
+                cache_path.parent.mkdir(parents=True, exist_ok=True)
+                tmp_path = cache_path.with_suffix(f".{os.getpid()}.tmp")
+                writer = pa.ipc.new_file(str(tmp_path), reader.schema)
+            for table in rebatch_rows(parsed_batches(), chunksize):
+                chunk = table.to_pandas(types_mapper=pd.ArrowDtype)
+                chunk.index += rows_read
+                rows_read += len(chunk)
+                yield chunk
+            if not parse_errors:
+                if writer is not None:
+                    writer.close()
+                    writer = None
+                    os.replace(tmp_path, cache_path)
+                    prune_csv_cache(cache_path)
+                    logging.info("Cached '%s' as Arrow IPC file '%s'.", input_file, cache_path)
+                return
+            logging.warning("PyArrow could not parse '%s' after %s rows, continuing with pandas: %s", input_file, rows_read, parse_errors[0])
+        except pa.lib.ArrowInvalid as e:
+            logging.warning("PyArrow could not parse '%s', continuing with pandas: %s", input_file, e)
+        finally:
+            # An incomplete parse (error or abandoned generator) never leaves a partial cache behind.
+            if writer is not None:
+                writer.close()
+            if tmp_path is not None and tmp_path.exists():
+                tmp_path.unlink()
+
+    # Keep the row numbering and Arrow-backed dtypes of any chunks PyArrow already produced.
+    skiprows = range(1, rows_read + 1) if rows_read else None
+    reader_options = {"dtype_backend": "pyarrow"} if pa is not None else {}
+    for chunk in pd.read_csv(input_file, chunksize=chunksize, skiprows=skiprows, **reader_options):
+        chunk.index += rows_read
+        yield chunk
+
+def prefetch(iterable, maxsize=2):
+    """
+    Produce items from an iterable on a background thread, buffering at most maxsize ahead of the consumer.
+    Closing the returned generator stops the producer and closes `iterable`, so its cleanup still runs.
+    """
+    buffer = queue.Queue(maxsize=maxsize)
+    done = object()
+    stop = threading.Event()
+
+    def put(item):
+        while not stop.is_set():
+            try:
+                buffer.put(item, timeout=PREFETCH_POLL_INTERVAL)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def produce():
+        try:
+            for item in iterable:
+                if not put(item):
+                    break
+            else:
+                put(done)
+        except Exception as e:
+            put(e)
+        finally:
+            if hasattr(iterable, "close"):
+                iterable.close()
+
+    producer = threading.Thread(target=produce, daemon=True)
+    producer.start()
+    try:
+        while True:
+            item = buffer.get()
+            if item is done:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        stop.set()
+        producer.join()
+
+@functools.lru_cache(maxsize=None)
+def _hash_kernel():
+    """
+    Compile the parallel FNV-1a kernel used by _fast_content_hash.
+    Returns None when Numba or PyArrow is not installed.
+    """
+    try:
+        import numba
+        import numpy as np
+        import pyarrow  # noqa: F401  (needed to lay out the byte buffers)
+    except ImportError:
+        return None
+
+    # The kernel runs on the prefetch daemon thread; under the TBB layer its worker pool
+    # can hang interpreter shutdown, so pin the built-in workqueue layer before compiling.
+    numba.config.THREADING_LAYER = "workqueue"
+
+    @numba.njit(parallel=True, cache=True)
+    def fnv1a_batch(data, offsets, out):
+        for i in numba.prange(len(offsets) - 1):
+            h = np.uint64(FNV_OFFSET_BASIS)
+            for j in range(offsets[i], offsets[i + 1]):
+                h = (h ^ np.uint64(data[j])) * np.uint64(FNV_PRIME)
+            out[i] = h
+
+    return fnv1a_batch
+
+def content_hash_scheme():
+    return "fnv1a" if _hash_kernel() is not None else "pandas"
+
+def _fast_content_hash(df, content_columns):
+    """
+    Hash the content columns of every row into a uint64 Series.
+    With Numba, each column is laid out as one contiguous Arrow byte buffer plus offsets
+    and hashed in parallel; otherwise falls back to pd.util.hash_pandas_object.
+    """
+    import pandas as pd
+
+    kernel = _hash_kernel()
+    if kernel is None:
+        return pd.util.hash_pandas_object(df[content_columns], index=False)
+
+    import numpy as np
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    combined = np.zeros(len(df), dtype=np.uint64)
+    for col in content_columns:
+        values = pa.array(df[col], from_pandas=True)
+        if isinstance(values, pa.ChunkedArray):
+            values = values.combine_chunks()
+        values = pc.cast(values, pa.large_string()) if not pa.types.is_large_string(values.type) else values
+        _, offsets_buf, data_buf = values.buffers()
+        offsets = np.frombuffer(offsets_buf, dtype=np.int64)[values.offset:values.offset + len(values) + 1]
+        data = np.frombuffer(data_buf, dtype=np.uint8) if data_buf is not None else np.empty(0, dtype=np.uint8)
+
+        col_hashes = np.empty(len(values), dtype=np.uint64)
+        kernel(data, offsets, col_hashes)
+        if values.null_count:
+            col_hashes[values.is_null().to_numpy(zero_copy_only=False)] = np.uint64(FNV_NULL_HASH)
+        combined = combined * np.uint64(FNV_PRIME) ^ col_hashes
+    return pd.Series(combined, index=df.index)
+
+def deduplicate_rows(df, content_columns, seen_hashes=None):
+    """
+    Drop rows whose content columns duplicate an earlier row or a previously ingested row.
+    `seen_hashes` is an array or a set of hashes. Returns the filtered DataFrame and the
+    content hashes of the rows kept.
+    """
+    import numpy as np
+
+    hashes = _fast_content_hash(df, content_columns)
+    keep = ~hashes.duplicated()
+    if isinstance(seen_hashes, set):
+        # Probe the set row by row; isin() would copy the whole set on every call.
+        if seen_hashes:
+            seen = np.fromiter(map(seen_hashes.__contains__, hashes.tolist()), dtype=bool, count=len(hashes))
+            keep &= ~seen
+    elif seen_hashes is not None and len(seen_hashes):
+        keep &= ~hashes.isin(seen_hashes)
+
+    n_removed = int((~keep).sum())
+    if n_removed:
+        logging.info("Removed %s duplicate rows before ingestion; %d rows remain.", n_removed, int(keep.sum()))
+    return df[keep.to_numpy()], hashes[keep].to_numpy()
+
+def deduplicate_chunks(chunks, content_columns, seen_hashes):
+    """
+    Yield chunks with duplicate rows removed. `seen_hashes` is a list of hash arrays
+    (previously ingested rows) and is extended with the hashes of every row yielded.
+    """
+    import numpy as np
+
+    # One growing set is probed per chunk, so the cost stays linear in the rows seen
+    # instead of re-concatenating every earlier chunk's hashes.
+    known = set(np.concatenate(seen_hashes).tolist()) if seen_hashes else set()
+    try:
+        for chunk in chunks:
+            chunk, new_hashes = deduplicate_rows(chunk, content_columns, known)
+            known.update(new_hashes.tolist())
+            seen_hashes.append(new_hashes)
+            if len(chunk):
+                yield chunk
+    finally:
+        if hasattr(chunks, "close"):
+            chunks.close()
+
+async def ingest_chunks(kb_cli, kb_name, chunks, batch_size=DEFAULT_INSERT_BATCH_SIZE,
+                        workers=DEFAULT_INGEST_WORKERS, concurrent_index=False):
+    """
+    Insert DataFrame chunks into a knowledge base, then build its index.
+    Up to MAX_PENDING_CHUNKS chunks have JOBs in flight at once; with `concurrent_index`
+    the index JOB runs alongside the inserts (only for KBs that accept inserts while indexing).
+    """
+    # Every in-flight JOB can hold a worker thread in job.wait(), so the loop gets its own
+    # executor with room for `workers` JOBs, the chunk reader and the index JOB, instead of
+    # the default min(32, cpu + 4) threads.
+    asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=workers + 2))
+    index_task = asyncio.create_task(kb_cli.acreate_index_with_job(kb_name)) if concurrent_index else None
+    # One semaphore across all chunks, so at most `workers` insert JOBs run at once.
+    limiter = asyncio.Semaphore(workers)
+    pending = set()
+    while True:
+        chunk = await asyncio.to_thread(next, chunks, None)
+        if chunk is None:
+            break
+        pending.add(asyncio.create_task(
+            kb_cli.ainsert_data_with_job(kb_name, chunk, batch_size=batch_size, limiter=limiter)
+        ))
+        if len(pending) >= MAX_PENDING_CHUNKS:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                task.result()
+    await asyncio.gather(*pending)
+
+    if index_task is not None:
+        await index_task
+    else:
+        await kb_cli.acreate_index_with_job(kb_name)
+
+def seen_hashes_path(kb_name):
+    # Hashes from different schemes are not comparable, so each scheme keeps its own file.
+    scheme = content_hash_scheme()
+    suffix = "" if scheme == "pandas" else f".{scheme}"
+    return CACHE_DIR / f"{kb_name}.seen_hashes{suffix}.parquet"
+
+def load_seen_hashes(kb_name):
+    import pandas as pd
+
+    path = seen_hashes_path(kb_name)
+    if not path.exists():
+        return None
+    try:
+        return pd.read_parquet(path)["hash"].to_numpy()
     except Exception as e:
-        logging.error(f"Failed to load CSV file: {e}")
-        raise
+        logging.warning("Ignoring unreadable seen-hash cache '%s': %s", path, e)
+        return None
+
+def save_seen_hashes(kb_name, hashes):
+    import pandas as pd
+
+    path = seen_hashes_path(kb_name)
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        pd.DataFrame({"hash": hashes}).to_parquet(path, index=False)
+        logging.info("Recorded %d content hashes in '%s'.", len(hashes), path)
+    except Exception as e:
+        logging.warning("Failed to persist seen-hash cache '%s': %s", path, e)
 
 def main():
     parser = argparse.ArgumentParser(description="Advanced MindsDB Knowledge Base CLI with Jobs, Metadata, and AI Tables")
@@ -194,8 +1287,21 @@ def main():
     parser.add_argument('--gemini_api_key', help='Google Gemini API key')
     parser.add_argument('--input_file', help='CSV file path to ingest data')
     parser.add_argument('--query', help='Semantic query string')
+    parser.add_argument('--queries_file', help='File with one semantic query per line, searched in a single batched statement')
     parser.add_argument('--limit', type=int, default=10, help='Max results to return for queries')
     parser.add_argument('--relevance_threshold', type=float, default=0.5, help='Relevance threshold for semantic search')
+    parser.add_argument('--search_mode', choices=list(SEARCH_PREDICATES), default='semantic', help='semantic (vector index), fts (keyword LIKE match) or hybrid search')
+    parser.add_argument('--filter', type=parse_filters, default=None, help='Metadata filters applied before ranking, as key=value, key>=value or key<=value, comma-separated')
+    parser.add_argument('--sem_cache_threshold', type=float, default=DEFAULT_SEM_CACHE_THRESHOLD, help='Cosine similarity above which a cached query result is reused')
+    parser.add_argument('--no_cache', action='store_true', help='Bypass the local semantic search cache')
+    parser.add_argument('--cache_ttl', type=float, default=DEFAULT_CACHE_TTL, help='Seconds a cached search result stays valid')
+    parser.add_argument('--csv_chunksize', type=int, default=DEFAULT_CSV_CHUNKSIZE, help='Rows per chunk when streaming the CSV')
+    parser.add_argument('--csv_cache', action='store_true', help='Cache the parsed CSV as an Arrow IPC file and reuse it on later runs')
+    parser.add_argument('--insert_batch_size', type=int, default=DEFAULT_INSERT_BATCH_SIZE, help='Rows per insert batch during ingestion')
+    parser.add_argument('--ingest_workers', type=int, default=DEFAULT_INGEST_WORKERS, help='Number of insert batches to run concurrently')
+    parser.add_argument('--concurrent_index', action='store_true', help='Build the index while inserts are still running (KB must support inserts during index build)')
+    parser.add_argument('--incremental', action='store_true', help='Skip rows already ingested into this knowledge base by a previous run')
+    parser.add_argument('--output', choices=['table', 'csv'], default='table', help='Print query results as an aligned table or as CSV for piping')
     parser.add_argument('--create_ai_table', action='store_true', help='Flag to create an AI Table')
     parser.add_argument('--ai_table_name', help='Name of AI Table to create or query')
     parser.add_argument('--source_table', help='Source table for AI Table creation')
@@ -207,7 +1313,14 @@ def main():
 
     args = parser.parse_args()
 
-    kb_cli = MindsDBGeminiKBCLI(api_key=args.api_key, project=args.project)
+    kb_cli = MindsDBGeminiKBCLI(
+        api_key=args.api_key,
+        project=args.project,
+        gemini_api_key=args.gemini_api_key,
+        use_cache=not args.no_cache,
+        sem_cache_threshold=args.sem_cache_threshold,
+        cache_ttl=args.cache_ttl
+    )
     engine_name = "google_gemini_engine"
 
     # Create Gemini engine if Gemini API key provided
@@ -216,11 +1329,18 @@ def main():
 
     # Knowledge base ingestion and indexing with Jobs
     if args.kb_name and args.input_file:
-        df = load_csv(args.input_file)
+        import numpy as np
+        import pandas as pd
+
+        try:
+            columns = pd.read_csv(args.input_file, nrows=0).columns
+        except Exception as e:
+            logging.error("Failed to load CSV file: %s", e)
+            raise
 
-        id_column = "id" if "id" in df.columns else df.columns[0]
-        content_columns = ["content"] if "content" in df.columns else [col for col in df.columns if col != id_column]
-        metadata_columns = [col for col in df.columns if col not in content_columns + [id_column]]
+        id_column = "id" if "id" in columns else columns[0]
+        content_columns = ["content"] if "content" in columns else list(columns.difference([id_column], sort=False))
+        metadata_columns = list(columns.difference(content_columns, sort=False).difference([id_column], sort=False))
 
         kb_cli.create_knowledge_base(
             kb_name=args.kb_name,
@@ -230,8 +1350,25 @@ def main():
             id_column=id_column
         )
 
-        kb_cli.insert_data_with_job(args.kb_name, df)
-        kb_cli.create_index_with_job(args.kb_name)
+        # Hash files are keyed on the project-qualified name so projects never share one.
+        full_kb_name = kb_cli._qualify(args.kb_name)
+        previous_hashes = load_seen_hashes(full_kb_name) if args.incremental else None
+        seen_hashes = [previous_hashes] if previous_hashes is not None else []
+
+        # The reader thread parses and deduplicates the next chunk while earlier ones are being embedded and inserted.
+        chunks = prefetch(deduplicate_chunks(
+            iter_csv(args.input_file, chunksize=args.csv_chunksize, use_ipc_cache=args.csv_cache), content_columns, seen_hashes
+        ))
+        with contextlib.closing(chunks):
+            asyncio.run(ingest_chunks(
+                kb_cli, args.kb_name, chunks,
+                batch_size=args.insert_batch_size,
+                workers=args.ingest_workers,
+                concurrent_index=args.concurrent_index
+            ))
+
+        if args.incremental:
+            save_seen_hashes(full_kb_name, np.concatenate(seen_hashes) if seen_hashes else np.empty(0, dtype=np.uint64))
 
     # Semantic search query
     if args.kb_name and args.query:
@@ -239,12 +1376,42 @@ def main():
             kb_name=args.kb_name,
             query=args.query,
             limit=args.limit,
-            relevance_threshold=args.relevance_threshold
+            relevance_threshold=args.relevance_threshold,
+            search_mode=args.search_mode,
+            filters=args.filter
         )
         if results:
-            print("Semantic Search Results:")
-            for row in results:
-                print(row)
+            print_results("Semantic Search Results:", results, args.output)
+
+    # Batched semantic search queries, one per line
+    if args.kb_name and args.queries_file:
+        queries = [line for line in Path(args.queries_file).read_text().splitlines() if line.strip()]
+        batch_results = kb_cli.semantic_search_batch(
+            kb_name=args.kb_name,
+            queries=queries,
+            limit=args.limit,
+            relevance_threshold=args.relevance_threshold,
+            search_mode=args.search_mode,
+            filters=args.filter
+        )
+        found = [(query, results) for query, results in zip(queries, batch_results) if results]
+        if args.output == "csv" and found and all(hasattr(results, "schema") for _, results in found):
+            import pyarrow as pa
+
+            # One CSV with a leading query column rather than a header block per query. Cached
+            # results from earlier runs may type a column differently (e.g. an all-null
+            # latest_update), so schemas are promoted to a common one.
+            combined = pa.concat_tables([
+                results.add_column(0, "query", pa.array([query] * len(results), type=pa.string()))
+                for query, results in found
+            ], promote_options="permissive")
+            print_results("Semantic Search Results:", combined, args.output)
+        else:
+            for query, results in found:
+                print_results(f"Semantic Search Results for: {query}", results, args.output)
+
+    # Persist new search cache entries once, rather than after every miss
+    kb_cli.save_query_cache()
 
     # AI Table creation
     if args.create_ai_table:
@@ -267,9 +1434,7 @@ def main():
             limit=args.limit
         )
         if results:
-            print("AI Table Query Results:")
-            for row in results:
-                print(row)
+            print_results("AI Table Query Results:", results, args.output)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# kb_cli_gemini.py is a single module at the repository root, not an installed package.
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -0,0 +1,193 @@
+"""
+Tests for the pure helpers in kb_cli_gemini; none of them need a MindsDB server.
+"""
+import argparse
+import threading
+
+import pytest
+
+import kb_cli_gemini as kb
+
+
+def test_sql_literal_escapes_quotes_and_backslashes():
+    assert kb.sql_literal("it's") == "'it''s'"
+    assert kb.sql_literal("a\\b") == "'a\\\\b'"
+    # A trailing backslash must not escape the doubled quote that follows it.
+    assert kb.sql_literal("x\\' OR 1=1 --") == "'x\\\\'' OR 1=1 --'"
+
+
+def test_sql_literal_leaves_numbers_unquoted():
+    assert kb.sql_literal(3) == "3"
+    assert kb.sql_literal(0.5) == "0.5"
+
+
+def test_sql_identifier_rejects_injection():
+    assert kb.sql_identifier("project.kb_1") == "project.kb_1"
+    with pytest.raises(ValueError):
+        kb.sql_identifier("kb; DROP TABLE x")
+
+
+def test_parse_filters_operators_and_numbers():
+    filters = kb.parse_filters("category=support, updated_at>=2025-01-01,priority<=3,score=0.5")
+    assert filters == {
+        ("category", "="): "support",
+        ("updated_at", ">="): "2025-01-01",
+        ("priority", "<="): 3,
+        ("score", "="): 0.5,
+    }
+    assert kb.sql_filters(filters) == (
+        " AND category = 'support' AND priority <= 3 AND score = 0.5 AND updated_at >= '2025-01-01'"
+    )
+
+
+def test_parse_filters_keeps_non_finite_values_as_strings():
+    assert kb.parse_filters("a=nan") == {("a", "="): "nan"}
+
+
+@pytest.mark.parametrize("spec", ["no_operator", "bad;key=1", "key>value"])
+def test_parse_filters_rejects_invalid(spec):
+    with pytest.raises(argparse.ArgumentTypeError):
+        kb.parse_filters(spec)
+
+
+def test_quantize_int8_preserves_cosine_similarity():
+    np = pytest.importorskip("numpy")
+    rng = np.random.default_rng(0)
+    a, b = rng.normal(size=(2, 768)).astype(np.float32)
+    codes_a, weight_a = kb.quantize_int8(a)
+    codes_b, weight_b = kb.quantize_int8(b)
+    assert codes_a.dtype == np.int8
+    approx = float(codes_a.astype(np.int32) @ codes_b.astype(np.int32)) * weight_a * weight_b
+    exact = float(a @ b / (np.linalg.norm(a) * np.linalg.norm(b)))
+    assert approx == pytest.approx(exact, abs=0.01)
+    codes_self = float(codes_a.astype(np.int32) @ codes_a.astype(np.int32)) * weight_a * weight_a
+    assert codes_self == pytest.approx(1.0, abs=0.01)
+
+
+def test_quantize_int8_zero_vector():
+    np = pytest.importorskip("numpy")
+    codes, weight = kb.quantize_int8(np.zeros(4, dtype=np.float32))
+    assert weight == 0.0
+    assert not codes.any()
+
+
+def test_split_by_qid_arrow():
+    pa = pytest.importorskip("pyarrow")
+    table = pa.table({"qid": ["0", "1", "0"], "id": [1, 2, 3]})
+    first, second = kb.split_by_qid(table, ["0", "1"])
+    assert first.column_names == ["id"]
+    assert first["id"].to_pylist() == [1, 3]
+    assert second["id"].to_pylist() == [2]
+
+
+def test_split_by_qid_without_qid_column():
+    pa = pytest.importorskip("pyarrow")
+    results = kb.split_by_qid(pa.table({}), ["0", "1"])
+    assert [len(result) for result in results] == [0, 0]
+    assert kb.split_by_qid([], ["0"]) == [[]]
+
+
+def test_split_by_qid_rows():
+    rows = [{"qid": "0", "id": 1}, {"qid": "1", "id": 2}]
+    assert kb.split_by_qid(rows, ["1", "0"]) == [[{"id": 2}], [{"id": 1}]]
+
+
+def _write_csv(path, ids):
+    path.write_text("id,content\n" + "".join(f"{i},row {i}\n" for i in ids))
+
+
+def test_iter_csv_honours_chunksize_with_arrow(tmp_path, monkeypatch):
+    pytest.importorskip("pandas")
+    pytest.importorskip("pyarrow")
+    monkeypatch.setattr(kb, "ARROW_CSV_BLOCK_SIZE", 64)
+    csv_path = tmp_path / "data.csv"
+    _write_csv(csv_path, range(50))
+    chunks = list(kb.iter_csv(str(csv_path), chunksize=7))
+    assert [len(chunk) for chunk in chunks] == [7] * 7 + [1]
+    assert [chunk.index[0] for chunk in chunks] == list(range(0, 50, 7))
+
+
+def test_iter_csv_falls_back_to_pandas_mid_file(tmp_path, monkeypatch):
+    pytest.importorskip("pandas")
+    pytest.importorskip("pyarrow")
+    monkeypatch.setattr(kb, "ARROW_CSV_BLOCK_SIZE", 64)
+    monkeypatch.setattr(kb, "CACHE_DIR", tmp_path / "cache")
+    csv_path = tmp_path / "data.csv"
+    ids = [str(i) for i in range(50)]
+    ids[32] = "abc"  # parses as int64 in early blocks, so PyArrow fails here
+    _write_csv(csv_path, ids)
+
+    chunks = list(kb.iter_csv(str(csv_path), chunksize=7, use_ipc_cache=True))
+    assert [str(value) for chunk in chunks for value in chunk["id"].tolist()] == ids
+    assert [index for chunk in chunks for index in chunk.index] == list(range(50))
+    # A parse that did not finish leaves no cache entry behind.
+    assert not list((tmp_path / "cache" / "csv").glob("*"))
+
+
+def test_iter_csv_ipc_cache_replaces_stale_entry(tmp_path, monkeypatch):
+    pytest.importorskip("pandas")
+    pytest.importorskip("pyarrow")
+    monkeypatch.setattr(kb, "CACHE_DIR", tmp_path / "cache")
+    csv_path = tmp_path / "data.csv"
+    _write_csv(csv_path, range(3))
+    list(kb.iter_csv(str(csv_path), use_ipc_cache=True))
+    _write_csv(csv_path, range(4))
+    assert sum(len(chunk) for chunk in kb.iter_csv(str(csv_path), use_ipc_cache=True)) == 4
+    assert len(list((tmp_path / "cache" / "csv").glob("*.arrow"))) == 1
+    assert sum(len(chunk) for chunk in kb.iter_csv(str(csv_path), use_ipc_cache=True)) == 4
+
+
+def test_deduplicate_rows_against_seen_hashes():
+    pd = pytest.importorskip("pandas")
+    df = pd.DataFrame({"content": ["a", "b", "a", "c"]})
+    kept, hashes = kb.deduplicate_rows(df, ["content"])
+    assert kept["content"].tolist() == ["a", "b", "c"]
+
+    again = pd.DataFrame({"content": ["c", "d"]})
+    for seen in (hashes, set(hashes.tolist())):
+        kept, _ = kb.deduplicate_rows(again, ["content"], seen)
+        assert kept["content"].tolist() == ["d"]
+
+
+def test_deduplicate_chunks_across_chunks():
+    pd = pytest.importorskip("pandas")
+    chunks = iter([
+        pd.DataFrame({"content": ["a", "b"]}),
+        pd.DataFrame({"content": ["b", "c"]}),
+        pd.DataFrame({"content": ["a"]}),
+    ])
+    seen_hashes = []
+    kept = list(kb.deduplicate_chunks(chunks, ["content"], seen_hashes))
+    assert [chunk["content"].tolist() for chunk in kept] == [["a", "b"], ["c"]]
+    assert sum(len(hashes) for hashes in seen_hashes) == 3
+
+
+def test_prefetch_yields_in_order_and_propagates_errors():
+    assert list(kb.prefetch(iter(range(10)))) == list(range(10))
+
+    def failing():
+        yield 1
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError, match="boom"):
+        list(kb.prefetch(failing()))
+
+
+def test_prefetch_close_stops_producer_and_closes_source():
+    closed = threading.Event()
+
+    def source():
+        try:
+            i = 0
+            while True:
+                yield i
+                i += 1
+        finally:
+            closed.set()
+
+    before = threading.active_count()
+    items = kb.prefetch(source(), maxsize=1)
+    assert next(items) == 0
+    items.close()
+    assert closed.is_set()
+    assert threading.active_count() == before